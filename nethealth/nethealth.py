@@ -5,8 +5,14 @@
 import argparse
 import collections
 import dataclasses
+import errno
+import bisect
 import logging
+import math
 import random
+import selectors
+import shutil
+import struct
 import time
 import threading
 import socket
@@ -16,6 +22,30 @@ from . import packet
 
 LOG = logging.getLogger(__name__)
 
+# linux value, not exported by the socket module
+SO_TIMESTAMPNS = getattr(socket, 'SO_TIMESTAMPNS', 35)
+
+PAYLOAD = b'Hello World'
+RECV_SIZE = 2048
+
+# pings without a reply after this long count as lost
+TIMEOUT = 1.0
+
+# samples shown per host
+WINDOW = 60
+# replies per host kept for p99, must be at least 100
+HISTORY = 1000
+FRAME_INTERVAL = 0.05
+SORT_INTERVAL = 1.0
+
+MTU_MIN = 68
+MTU_MAX = 1500
+# every host must accept datagrams this large (RFC 791), used for packet
+# trains when the path MTU is unknown
+MTU_SAFE = 576
+PROBE_TIMEOUT = 1.0
+TRAIN_LENGTH = 8
+
 
 @dataclasses.dataclass
 class Ping:
@@ -23,7 +53,11 @@ class Ping:
   recv_time: float = dataclasses.field(kw_only=True, default=0)
   id: tuple = dataclasses.field(kw_only=True, default=0)
   send_ip: str = dataclasses.field(kw_only=True, default='')
+  link: str = dataclasses.field(kw_only=True, default='')
   recv_ip: str = dataclasses.field(kw_only=True, default='')
+  size: int = dataclasses.field(kw_only=True, default=0)
+  too_big: bool = dataclasses.field(kw_only=True, default=False)
+  mtu: int = dataclasses.field(kw_only=True, default=0)
 
   @property
   def lag(self):
@@ -33,16 +67,74 @@ class Ping:
   def status(self):
     return self.recv_time > 1
 
+@dataclasses.dataclass
+class Bandwidth:
+  bps: float
+  # the train never queued at the bottleneck, so this is our send rate
+  # and the bottleneck is at least this fast
+  lower_bound: bool = dataclasses.field(kw_only=True, default=False)
+
+  def __str__(self):
+    return f'{">" if self.lower_bound else ""}{format_bps(self.bps).strip()}'
+
+
+class Link:
+  '''
+  An uplink to ping from, selected by source address and/or interface.
+  '''
+  def __init__(self, addr='0.0.0.0', device=None) -> None:
+    self.addr = addr
+    self.device = device
+    self.name = device or addr
+
+    try:
+      self.socket = socket.socket(
+        socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP)
+      self.socket.setsockopt(socket.SOL_SOCKET, SO_TIMESTAMPNS, 1)
+
+      # header-included socket for DF probes, replies arrive on self.socket
+      self.probe_socket = socket.socket(
+        socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_RAW)
+
+      if device:
+        for sock in (self.socket, self.probe_socket):
+          sock.setsockopt(
+            socket.SOL_SOCKET, socket.SO_BINDTODEVICE, device.encode())
+      # bind both so probes follow the same source based routing as pings
+      self.socket.bind((addr, 0))
+      self.probe_socket.bind((addr, 0))
+    except OSError as e:
+      # e.g. ENODEV for an unknown interface, EADDRNOTAVAIL for an address
+      # that isn't ours
+      raise OSError(e.errno, f'cannot ping from {self.name}: {e.strerror}')
+
+
 class NetHealth:
-  host = collections.defaultdict(list)
+  # keyed by (link name, host), the last WINDOW pings
+  host = collections.defaultdict(lambda: collections.deque(maxlen=WINDOW))
+  # in flight, expired after TIMEOUT
   pings = {}
+  mtu = {}
+  bandwidth = {}
+  # last HISTORY reply times, in arrival order and sorted
+  lags = collections.defaultdict(collections.deque)
+  sorted_lags = collections.defaultdict(list)
+  # loss over the last WINDOW pings, refreshed every SORT_INTERVAL
+  loss = {}
 
 
   def __init__(self, args) -> None:
-    self.socket = socket.socket(
-      socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP)
-    # TODO accept bind addr arg
-    self.socket.bind(('0.0.0.0', 0))
+    # the link name keys samples and replies, so it must be unique
+    self.links = [Link(addr=a) for a in dict.fromkeys(args.bind or [])]
+    self.links += [Link(device=d) for d in dict.fromkeys(args.interface or [])]
+    if not self.links:
+      self.links.append(Link())
+
+    self.probe_mtu = args.mtu
+    self.probe_bandwidth = args.bandwidth
+    self.probe_interval = args.probe_interval
+    # set by stop() to wake the interval sleeps
+    self.stopped = threading.Event()
 
     self.hosts = [
       '172.17.64.1',
@@ -51,31 +143,165 @@ class NetHealth:
       '8.8.8.8',
       '54.186.50.116',
     ]
-
-  def ping(self, ip, i, s):
+    # the names hosts were given as, for display and filtering
+    self.names = {}
+    if args.hosts:
+      self.hosts = list(dict.fromkeys(ip for name, ip in args.hosts))
+      self.names = {
+        ip: name for name, ip in reversed(args.hosts) if name != ip}
+
+  def label(self, ip, width=None):
+    name = self.names.get(ip)
+    if not name:
+      return ip
+    return f'{name[:width]} {ip}'
+
+  def ping(self, link, ip, i, s):
     p = Ping(
       id=(i, s),
       send_time=time.time(),
       send_ip=ip,
+      link=link.name,
+    )
+    self.pings[p.id] = p
+    self.host[(link.name, ip)].append(p)
+    icmp = packet.IcmpPing(typ=8, code=0, identifier=i, sequence=s, data=PAYLOAD)
+    link.socket.sendto(bytes(icmp), (ip, 1))
+
+  def probe(self, link, ip, size):
+    '''
+    Send a `size` byte echo request with the DF bit set.
+    The returned Ping is not recorded in the host's latency history.
+    '''
+    i = random.getrandbits(16)
+    s = random.getrandbits(16)
+    p = Ping(
+      id=(i, s),
+      send_ip=ip,
+      link=link.name,
+      size=size,
     )
+    n = size - packet.Ipv4.FORMAT_LEN - packet.IcmpPing.FORMAT_LEN
+    icmp = packet.IcmpPing(
+      typ=packet.ICMP_ECHO_REQUEST, code=0, identifier=i, sequence=s,
+      data=(PAYLOAD * (n // len(PAYLOAD) + 1))[:n])
+    ip_header = packet.Ipv4(
+      version=4,
+      ihl=packet.Ipv4.FORMAT_LEN // 4,
+      tos=0,
+      total_length=size,
+      identification=0, # filled in by the kernel
+      flags=packet.IP_FLAG_DF,
+      fragment_offset=0,
+      ttl=64,
+      protocol=socket.IPPROTO_ICMP,
+      src=socket.inet_aton(link.addr), # filled in by the kernel if 0
+      dst=socket.inet_aton(ip),
+      options=b'',
+    )
+    data = bytes(ip_header) + bytes(icmp)
+    p.send_time = time.time()
     self.pings[p.id] = p
-    self.host[ip].append(p)
-    icmp = packet.IcmpPing(typ=8, code=0, identifier=i, sequence=s, data=b'Hello World')
-    self.socket.sendto(bytes(icmp), (ip, 1))
+    try:
+      link.probe_socket.sendto(data, (ip, 0))
+    except OSError as e:
+      if e.errno != errno.EMSGSIZE:
+        raise
+      # larger than the local interface MTU
+      self.pings.pop(p.id, None)
+      p.too_big = True
+    return p
+
+  def wait(self, pings, timeout=PROBE_TIMEOUT):
+    end = time.time() + timeout
+    while time.time() < end:
+      if all(p.status or p.too_big for p in pings):
+        break
+      time.sleep(0.01)
+    for p in pings:
+      self.pings.pop(p.id, None)
+
+  def discover_mtu(self, link, ip):
+    '''
+    Binary search for the largest DF datagram that gets an echo reply.
+    Returns None if the host never replied.
+    '''
+    # a host that drops ICMP would otherwise cost a timeout per step
+    ps = [self.probe(link, ip, MTU_MIN) for _ in range(2)]
+    self.wait(ps)
+    if not any(p.status for p in ps):
+      return None
+    lo, hi = MTU_MIN, MTU_MAX
+    while lo < hi:
+      size = (lo + hi + 1) // 2
+      # send two so a single lost packet doesn't look like a black hole
+      ps = [self.probe(link, ip, size) for _ in range(2)]
+      self.wait(ps)
+      if any(p.status for p in ps):
+        lo = size
+        continue
+      hi = size - 1
+      for p in ps:
+        # next-hop MTU from a fragmentation needed error (RFC 1191)
+        if p.too_big and lo < p.mtu < size:
+          hi = p.mtu
+    return lo
+
+  def estimate_bandwidth(self, link, ip, size):
+    '''
+    Send a back to back train of `size` byte probes and estimate the
+    bottleneck capacity from the dispersion of the replies.
+    Returns None if fewer than two replies came back.
+    '''
+    train = [self.probe(link, ip, size) for _ in range(TRAIN_LENGTH)]
+    self.wait(train)
+    got = [i for i, p in enumerate(train) if p.status]
+    if len(got) < 2:
+      return None
+    first, last = train[got[0]], train[got[-1]]
+    send_dispersion = last.send_time - first.send_time
+    recv_dispersion = last.recv_time - first.recv_time
+    if recv_dispersion <= 0:
+      return None
+    # probes lost in the middle of the train still crossed the bottleneck
+    bits = (got[-1] - got[0]) * size * 8
+    return Bandwidth(bits / recv_dispersion,
+      lower_bound=recv_dispersion <= send_dispersion)
+
+  def probe_host(self, link, ip):
+    key = (link.name, ip)
+    if self.probe_mtu:
+      self.mtu[key] = self.discover_mtu(link, ip)
+    size = self.mtu.get(key) or MTU_SAFE
+    if self.probe_bandwidth:
+      self.bandwidth[key] = self.estimate_bandwidth(link, ip, size)
 
   def start(self):
     self.running = True
+    self.stopped.clear()
     self.thread = threading.Thread(target=self.run)
     self.thread.daemon = True
     self.thread.start()
     self.recv_thread = threading.Thread(target=self.run_recv)
     self.recv_thread.daemon = True
     self.recv_thread.start()
+    self.stats_thread = threading.Thread(target=self.run_stats)
+    self.stats_thread.daemon = True
+    self.stats_thread.start()
+    self.probe_thread = None
+    if self.probe_mtu or self.probe_bandwidth:
+      self.probe_thread = threading.Thread(target=self.run_probe)
+      self.probe_thread.daemon = True
+      self.probe_thread.start()
 
   def stop(self):
     self.running = False
+    self.stopped.set()
     self.thread.join()
     self.recv_thread.join()
+    self.stats_thread.join()
+    if self.probe_thread:
+      self.probe_thread.join()
 
   def run(self):
     start = time.time()
@@ -83,44 +309,137 @@ class NetHealth:
     count = 0
     while self.running:
       try:
-        for h in self.hosts:
-          i = random.getrandbits(16)
-          s = random.getrandbits(16)
-          self.ping(h, i, s)
+        for link in self.links:
+          for h in self.hosts:
+            i = random.getrandbits(16)
+            s = random.getrandbits(16)
+            self.ping(link, h, i, s)
+        count += 1
+        # skip ticks we overran instead of bursting to catch up
+        count = max(count, math.ceil((time.time() - start) / interval))
+        time.sleep(max(0, start + count * interval - time.time()))
       except:
         LOG.exception('Error in NetHealth loop')
-        count += 9
-      count += 1
-      time.sleep(start + count * interval - time.time())
+        time.sleep(1)
+
+  def recent(self, key):
+    '''
+    The last WINDOW pings to a (link name, host), oldest first.
+    '''
+    return list(self.host.get(key, ()))
+
+  def run_stats(self):
+    # loss is computed here so sorting by it doesn't stall the TUI
+    while self.running:
+      start = time.time()
+      try:
+        loss = {}
+        for link in self.links:
+          for h in self.hosts:
+            key = (link.name, h)
+            loss[key] = Dataset(self.recent(key)).loss
+        self.loss = loss
+        # replies this late are counted as lost anyway
+        for id, p in list(self.pings.items()):
+          if start - p.send_time > TIMEOUT:
+            self.pings.pop(id, None)
+      except:
+        LOG.exception('Error in NetHealth stats loop')
+      self.stopped.wait(max(0, start + SORT_INTERVAL - time.time()))
+
+  def add_lag(self, key, lag):
+    window = self.lags[key]
+    lags = self.sorted_lags[key]
+    # remove before inserting so the list never grows past HISTORY,
+    # which keeps p99() in range without a lock
+    if len(window) >= HISTORY:
+      del lags[bisect.bisect_left(lags, window.popleft())]
+    window.append(lag)
+    bisect.insort(lags, lag)
+
+  def p99(self, key):
+    lags = self.sorted_lags.get(key)
+    if not lags:
+      return 0
+    # nearest rank
+    return lags[math.ceil(0.99 * len(lags)) - 1]
+
+  def run_probe(self):
+    while self.running:
+      start = time.time()
+      for link in self.links:
+        for h in self.hosts:
+          if not self.running:
+            return
+          try:
+            self.probe_host(link, h)
+          except:
+            LOG.exception('Error in NetHealth probe loop')
+      self.stopped.wait(max(0, start + self.probe_interval - time.time()))
 
   def run_recv(self):
+    sel = selectors.DefaultSelector()
+    for link in self.links:
+      sel.register(link.socket, selectors.EVENT_READ, link)
     while self.running:
       try:
-        self.recv()
+        for key, mask in sel.select(1):
+          self.recv(key.data)
       except:
         LOG.exception('Error in NetHealth recv loop')
         time.sleep(1)
 
-  def recv(self):
-    data, host = self.socket.recvfrom(512)
+  def recv(self, link):
+    data, ancdata, flags, host = link.socket.recvmsg(
+      RECV_SIZE, socket.CMSG_SPACE(16))
+    recv_time = time.time()
+    for level, typ, cdata in ancdata:
+      # kernel receive timestamp, struct timespec
+      if level == socket.SOL_SOCKET and typ == SO_TIMESTAMPNS:
+        sec, nsec = struct.unpack('@qq', cdata[:16])
+        recv_time = sec + nsec * 1e-9
     # print((data, host))
     try:
       ip_header = packet.Ipv4.from_bytes(data[:20])
       # print(ip_header)
-      # TODO read header first
-      p = packet.IcmpPing.from_bytes(data[20:])
+      p = packet.IcmpPing.from_bytes(data[ip_header.ihl * 4:])
       # print(p)
-      rq = self.pings.pop((p.identifier, p.sequence), None)
+      if (p.typ == packet.ICMP_DEST_UNREACH and
+          p.code == packet.ICMP_CODE_FRAG_NEEDED):
+        self.recv_frag_needed(link, p)
+        return
+      if p.typ != packet.ICMP_ECHO_REPLY:
+        return
+      rq = self.pings.get((p.identifier, p.sequence))
       if not rq:
-        LOG.error("got echo reply we did not requst")
+        # late reply to a probe that already timed out, or a reply seen by
+        # more than one link socket
+        LOG.debug("got echo reply we did not requst")
+      elif rq.link != link.name:
+        # seen by a socket that overlaps with the sending link
+        return
       else:
-        rq.recv_time = time.time()
+        self.pings.pop(rq.id, None)
+        rq.recv_time = recv_time
         rq.recv_ip = ip_header.src
+        if not rq.size:
+          self.add_lag((rq.link, rq.send_ip), rq.lag)
         # LOG.info(rq)
         # self.host[rq.send_ip].append(rq)
     except:
       LOG.exception('failed to parse IcmpPing')
 
+  def recv_frag_needed(self, link, icmp):
+    # the error quotes our IP header and the first 8 bytes of our echo request
+    ip_header = packet.Ipv4.from_bytes(icmp.data[:20])
+    orig = packet.IcmpPing.from_bytes(icmp.data[ip_header.ihl * 4:])
+    rq = self.pings.get((orig.identifier, orig.sequence))
+    if rq and rq.link == link.name:
+      self.pings.pop(rq.id, None)
+      rq.too_big = True
+      # next-hop MTU lives in the low half of the unused header field
+      rq.mtu = icmp.sequence
+
 
 class Dataset:
   def __init__(self, data) -> None:
@@ -129,6 +448,8 @@ class Dataset:
     self.min = 1
     self.sum = 0
     self.n = 0
+    self.lost = 0
+    now = time.time()
     for d in self.data:
       if d.status:
         l = d.lag
@@ -136,9 +457,20 @@ class Dataset:
         self.sum += l
         self.max = max(self.max, l)
         self.min = min(self.min, l)
+      elif now - d.send_time > TIMEOUT:
+        self.lost += 1
     if self.max == 0:
       self.max = 1
 
+  @property
+  def loss(self):
+    total = self.n + self.lost
+    return self.lost / total if total else 0
+
+  @property
+  def avg(self):
+    return self.sum / self.n if self.n else 0
+
   def as_graph(self):
     blocks = '▁▂▃▄▅▆▇'
     s = []
@@ -155,33 +487,238 @@ class Dataset:
     return ''.join(s)
 
 
+def format_bps(bps):
+  for unit in ('', 'K', 'M', 'G'):
+    if bps < 1000:
+      break
+    bps /= 1000
+  return f'{bps:5.1f}{unit}'
+
 
 
 class NetTui:
+  '''
+  Keys:
+    s         cycle sort order (none, loss, p99)
+    /         filter hosts, enter to keep, esc to clear
+    arrows, pgup/pgdn, home/end, mouse wheel to scroll
+    click     per-host detail, esc or click to go back
+    q         quit
+  '''
+  SORTS = ('none', 'loss', 'p99')
+  HEADER_LINES = 1
+  # a 15 character name and an IPv4 address
+  LABEL_WIDTH = 31
+
   def __init__(self, nh, args):
     self.nh = nh
+    self.running = True
+    self.sort = 'none'
+    self.filter = ''
+    self.filtering = False
+    self.scroll = 0
+    self.detail = None
+    self.rows = []
+    self.rows_time = 0
 
   def run(self):
-    while 1:
-      print(term.ANSI.cursor_pos(1, 1), end='')
-      for host, rqs in list(self.nh.host.items()):
-        ds = Dataset(rqs[-60:])
-        print(f'{host:>20}: {ds.as_graph()}', end='')
-        print(term.ANSI.erase_line(0), end='')
-        print(term.ANSI.cursor_column(85), end='')
-        print(f'[max: {ds.max * 1000:3.0f}, min: {ds.min * 1000:3.0f}]', end='')
-        print(term.ANSI.erase_line(0))
-      print(term.ANSI.erase_display(0), end='')
+    sel = selectors.DefaultSelector()
+    with term.Input() as keys:
+      if keys.enabled:
+        sel.register(keys, selectors.EVENT_READ)
+      next_frame = 0
+      while self.running:
+        for key, mask in sel.select(max(0, next_frame - time.time())):
+          for event in keys.read():
+            self.handle(event)
+          if keys.closed:
+            sel.unregister(keys)
+          # redraw right away so input feels responsive
+          next_frame = 0
+        if time.time() >= next_frame:
+          self.render()
+          next_frame = time.time() + FRAME_INTERVAL
+
+  def page_size(self):
+    return shutil.get_terminal_size().lines - self.HEADER_LINES
+
+  def handle(self, event):
+    if isinstance(event, term.Mouse):
+      self.handle_mouse(event)
+    elif self.filtering:
+      self.handle_filter(event.name)
+    elif self.detail:
+      if event.name in ('esc', 'enter', 'q'):
+        self.detail = None
+    elif event.name == 'q':
+      self.running = False
+    elif event.name == 's':
+      self.sort = self.SORTS[(self.SORTS.index(self.sort) + 1) % len(self.SORTS)]
+      self.rows_time = 0
+    elif event.name == '/':
+      self.filtering = True
+    elif event.name in ('up', 'k'):
+      self.scroll -= 1
+    elif event.name in ('down', 'j'):
+      self.scroll += 1
+    elif event.name == 'pgup':
+      self.scroll -= self.page_size()
+    elif event.name == 'pgdn':
+      self.scroll += self.page_size()
+    elif event.name == 'home':
+      self.scroll = 0
+    elif event.name == 'end':
+      self.scroll = len(self.rows)
+
+  def handle_filter(self, name):
+    if name == 'enter':
+      self.filtering = False
+    elif name == 'esc':
+      self.filtering = False
+      self.filter = ''
+    elif name == 'backspace':
+      self.filter = self.filter[:-1]
+    elif len(name) == 1 and name.isprintable():
+      self.filter += name
+    else:
+      return
+    self.scroll = 0
+    self.rows_time = 0
+
+  def handle_mouse(self, event):
+    if event.button == term.Mouse.WHEEL_UP:
+      self.scroll -= 3
+    elif event.button == term.Mouse.WHEEL_DOWN:
+      self.scroll += 3
+    elif event.button == 0 and event.pressed:
+      if self.detail:
+        self.detail = None
+        return
+      i = self.scroll + event.row - 1 - self.HEADER_LINES
+      if 0 <= i < len(self.rows) and isinstance(self.rows[i], tuple):
+        self.detail = self.rows[i]
+
+  def update_rows(self):
+    '''
+    Filter and sort the (link name, host) rows, grouped under their Link.
+    Sort keys are maintained by NetHealth, this is only redone every
+    SORT_INTERVAL or when the sort or filter changes.
+    '''
+    rows = []
+    for link in self.nh.links:
+      hosts = [h for h in self.nh.hosts if self.filter in self.nh.label(h)]
+      if self.sort == 'loss':
+        hosts.sort(key=lambda h: self.nh.loss.get((link.name, h), 0),
+          reverse=True)
+      elif self.sort == 'p99':
+        hosts.sort(key=lambda h: self.nh.p99((link.name, h)), reverse=True)
+      rows.append(link)
+      rows.extend((link.name, h) for h in hosts)
+    self.rows = rows
+    self.rows_time = time.time()
+
+  def format_row(self, row):
+    if isinstance(row, Link):
+      return (f'{term.ANSI.graphics(term.ANSI.GRAPHICS.BOLD)}{row.name}'
+        f'{term.ANSI.graphics_reset()}')
+    link, host = row
+    ds = Dataset(self.nh.recent(row))
+    s = [
+      f'{self.nh.label(host, 15):>{self.LABEL_WIDTH}}: {ds.as_graph()}',
+      term.ANSI.erase_line(0),
+      term.ANSI.cursor_column(self.LABEL_WIDTH + WINDOW + 5),
+      f'[max: {ds.max * 1000:3.0f}, min: {ds.min * 1000:3.0f}, '
+      f'p99: {self.nh.p99(row) * 1000:3.0f}, loss: {ds.loss * 100:3.0f}%]',
+    ]
+    if row in self.nh.mtu:
+      s.append(f' [mtu: {self.nh.mtu[row] or "?":>4}]')
+    if row in self.nh.bandwidth:
+      bw = self.nh.bandwidth[row]
+      s.append(f' [bw: {str(bw) if bw else "?":>7}bps]')
+    return ''.join(s)
 
-      time.sleep(0.05)
+  def format_detail(self, row, size):
+    link, host = row
+    rqs = self.nh.recent(row)
+    ds = Dataset(rqs)
+    bw = self.nh.bandwidth.get(row)
+    lines = [
+      f'{term.ANSI.graphics(term.ANSI.GRAPHICS.BOLD)}{self.nh.label(host)} via {link}'
+        f'{term.ANSI.graphics_reset()}',
+      f'  last {len(rqs)} pings',
+      f'  min: {ds.min * 1000:.1f}ms  avg: {ds.avg * 1000:.1f}ms  '
+        f'max: {ds.max * 1000:.1f}ms  p99: {self.nh.p99(row) * 1000:.1f}ms  '
+        f'loss: {ds.loss * 100:.1f}%',
+      f'  mtu: {self.nh.mtu.get(row) or "?"}  '
+        f'bw: {bw or "?"}bps',
+      ds.as_graph(),
+      '',
+    ]
+    n = max(0, size.lines - len(lines) - 1)
+    for p in reversed(rqs[-n:] if n else []):
+      when = time.strftime('%H:%M:%S', time.localtime(p.send_time))
+      lag = f'{p.lag * 1000:.1f}ms' if p.status else 'lost'
+      lines.append(f'  {when} {p.id[0]:5d}/{p.id[1]:<5d} {lag}')
+    return lines
+
+  def render(self):
+    size = shutil.get_terminal_size()
+    if time.time() - self.rows_time > SORT_INTERVAL:
+      self.update_rows()
+    if self.detail:
+      lines = self.format_detail(self.detail, size)
+    else:
+      # only the visible rows are formatted
+      page = size.lines - self.HEADER_LINES
+      self.scroll = max(0, min(self.scroll, len(self.rows) - page))
+      visible = self.rows[self.scroll:self.scroll + page]
+      status = (f'sort: {self.sort}  filter: {self.filter}'
+        f'{"_" if self.filtering else ""}  '
+        f'rows {self.scroll + 1}-{self.scroll + len(visible)} of {len(self.rows)}'
+        f'  [s]ort [/]filter [q]uit')
+      lines = [status] + [self.format_row(r) for r in visible]
+    out = [term.ANSI.cursor_pos(1, 1)]
+    for line in lines[:size.lines]:
+      out.append(line)
+      out.append(term.ANSI.erase_line(0))
+      out.append('\n')
+    # don't scroll the terminal past the last line
+    if out[-1] == '\n':
+      out.pop()
+    out.append(term.ANSI.erase_display(0))
+    print(''.join(out), end='', flush=True)
+
+
+def ipv4_host(name):
+  # resolve once, sending to a name would look it up on every ping
+  try:
+    return name, socket.gethostbyname(name)
+  except OSError as e:
+    raise argparse.ArgumentTypeError(f'cannot resolve {name!r}: {e}')
 
 
 def main():
   parser = argparse.ArgumentParser(
-    formatter_class=argparse.RawTextHelpFormatter, description=__doc__)
+    formatter_class=argparse.RawTextHelpFormatter, description=__doc__,
+    epilog=NetTui.__doc__)
+  parser.add_argument('hosts', nargs='*', type=ipv4_host,
+    help='hosts to ping, names are resolved to IPv4 once at startup')
+  parser.add_argument('--bind', action='append', metavar='ADDR',
+    help='source address to ping from, may be repeated to compare uplinks')
+  parser.add_argument('--interface', action='append', metavar='IFACE',
+    help='interface to ping from (SO_BINDTODEVICE), may be repeated')
+  parser.add_argument('--mtu', action='store_true',
+    help='discover the path MTU to each host')
+  parser.add_argument('--bandwidth', action='store_true',
+    help='estimate the bottleneck bandwidth to each host with packet trains')
+  parser.add_argument('--probe-interval', type=float, default=60,
+    help='seconds between MTU/bandwidth probes (default: %(default)s)')
 
   args = parser.parse_args()
-  nh = NetHealth(args)
+  try:
+    nh = NetHealth(args)
+  except OSError as e:
+    parser.error(e.strerror)
   nh.start()
 
   tui = NetTui(nh, args)
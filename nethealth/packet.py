@@ -3,6 +3,15 @@ import dataclasses
 import struct
 
 
+IP_FLAG_DF = 0b010
+
+ICMP_ECHO_REPLY = 0
+ICMP_DEST_UNREACH = 3
+ICMP_ECHO_REQUEST = 8
+
+ICMP_CODE_FRAG_NEEDED = 4
+
+
 def checksum(bytes):
   if len(bytes) & 1:
     m = memoryview(bytes)[:-1].cast('@H')
@@ -11,7 +20,8 @@ def checksum(bytes):
     m = memoryview(bytes).cast('@H')
     s = 0
   s += sum(m)
-  s += (s >> 16)
+  while s >> 16:
+    s = (s & 0xffff) + (s >> 16)
   s = (~s) & 0xffff
   return struct.pack('@H', s)
 
@@ -37,7 +47,7 @@ class Ipv4:
   def __bytes__(self):
     for i in range(2):
       version_ihl = (self.version << 4) | self.ihl
-      flags_frag = (self.flags << 3) | self.fragment_offset
+      flags_frag = (self.flags << 13) | self.fragment_offset
       b = struct.pack(self.FORMAT,
         version_ihl,
         self.tos,
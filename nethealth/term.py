@@ -3,14 +3,17 @@
 
 
 import argparse
+import dataclasses
 import enum
 import locale
 import os
+import re
 import sys
 from enum import Enum, IntEnum
 
 try:
     import termios
+    import tty
 except ImportError:
     termios = None
 
@@ -234,11 +237,11 @@ class ANSI:
 
   @staticmethod
   def mouse(x):
-    return ANSI.control('?', ANSI.CONTROL.MOUSE_ON)
+    return f'{ANSI.ESC}{ANSI.CSI}?{x}{ANSI.CONTROL.MOUSE_ON}'
 
   @staticmethod
   def mouse_off(x):
-    return ANSI.control('?' , ANSI.CONTROL.MOUSE_OFF)
+    return f'{ANSI.ESC}{ANSI.CSI}?{x}{ANSI.CONTROL.MOUSE_OFF}'
 
   @staticmethod
   def cursor_column(col):
@@ -257,6 +260,134 @@ class ANSI:
     return ANSI.control(x, ANSI.CONTROL.ERASE_LINE)
 
 
+@dataclasses.dataclass
+class Key:
+  # a single character, or one of Input.KEYS
+  name: str
+
+
+@dataclasses.dataclass
+class Mouse:
+  WHEEL_UP    = 64
+  WHEEL_DOWN  = 65
+
+  button: int
+  col: int
+  row: int
+  pressed: bool
+
+
+class Input:
+  '''
+  Keyboard and SGR mouse input from a tty.
+
+  Use as a context manager, register with a selector, and call read()
+  when it is readable; read() never blocks.
+  '''
+  KEYS = {
+    b'\x1b[A':   'up',
+    b'\x1b[B':   'down',
+    b'\x1b[C':   'right',
+    b'\x1b[D':   'left',
+    b'\x1b[H':   'home',
+    b'\x1b[F':   'end',
+    b'\x1b[1~':  'home',
+    b'\x1b[3~':  'delete',
+    b'\x1b[4~':  'end',
+    b'\x1b[5~':  'pgup',
+    b'\x1b[6~':  'pgdn',
+    b'\x1bOA':   'up',
+    b'\x1bOB':   'down',
+    b'\x1bOH':   'home',
+    b'\x1bOF':   'end',
+    b'\r':       'enter',
+    b'\n':       'enter',
+    b'\t':       'tab',
+    b'\x7f':     'backspace',
+    b'\x08':     'backspace',
+  }
+  # complete and incomplete CSI (ESC [) and SS3 (ESC O) sequences
+  CSI = re.compile(rb'\x1b\[[0-?]*[ -/]*[@-~]|\x1bO[@-~]')
+  CSI_PARTIAL = re.compile(rb'\x1b\[[0-?]*[ -/]*|\x1bO')
+  MOUSE_SGR = re.compile(rb'\x1b\[<(\d+);(\d+);(\d+)([Mm])')
+
+  def __init__(self, fd=None, mouse=ANSI.MOUSE.VT200):
+    self.fd = sys.stdin.fileno() if fd is None else fd
+    self.mouse = mouse
+    self.enabled = termios is not None and os.isatty(self.fd)
+    self.closed = False
+    self.buf = b''
+
+  def fileno(self):
+    return self.fd
+
+  def __enter__(self):
+    if self.enabled:
+      self.orig_settings = termios.tcgetattr(self.fd)
+      tty.setcbreak(self.fd)
+      print(ANSI.mouse(self.mouse), end='')
+      print(ANSI.mouse(ANSI.MOUSE.SGR_EXT_MODE), end='', flush=True)
+    return self
+
+  def __exit__(self, *exc):
+    if self.enabled:
+      print(ANSI.mouse_off(self.mouse), end='')
+      print(ANSI.mouse_off(ANSI.MOUSE.SGR_EXT_MODE), end='', flush=True)
+      termios.tcsetattr(self.fd, termios.TCSADRAIN, self.orig_settings)
+
+  def read(self):
+    '''
+    Read what is available and return the complete events in it.
+    Only call once the fd is readable. Sets `closed` on EOF or hangup,
+    after which the fd should no longer be selected.
+    '''
+    try:
+      data = os.read(self.fd, 4096)
+    except OSError:
+      data = b''
+    if not data:
+      self.closed = True
+      self.buf = b''
+      return []
+    # a partial sequence at the end of a read completes on the next one
+    self.buf += data
+    return list(self.parse())
+
+  def parse(self):
+    while self.buf:
+      b = self.buf
+      if b[0] == 0x1b:
+        m = self.CSI.match(b)
+        if m:
+          seq = m.group()
+          self.buf = b[m.end():]
+          mouse = self.MOUSE_SGR.fullmatch(seq)
+          if mouse:
+            button, col, row, action = mouse.groups()
+            yield Mouse(
+              button=int(button), col=int(col), row=int(row),
+              pressed=action == b'M')
+          elif seq in self.KEYS:
+            yield Key(self.KEYS[seq])
+          # sequences we don't know are dropped
+          continue
+        if len(b) > 1 and self.CSI_PARTIAL.fullmatch(b):
+          return
+        # bare escape
+        self.buf = b[1:]
+        yield Key('esc')
+        continue
+      if b[:1] in self.KEYS:
+        self.buf = b[1:]
+        yield Key(self.KEYS[b[:1]])
+        continue
+      # utf-8 lead byte gives the length of the character
+      n = 1 if b[0] < 0xc0 else 2 if b[0] < 0xe0 else 3 if b[0] < 0xf0 else 4
+      if len(b) < n:
+        return
+      self.buf = b[n:]
+      yield Key(b[:n].decode(errors='replace'))
+
 
 def t_colors():
     print('** Color support ' + '*' * 40)